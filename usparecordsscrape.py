@@ -1,7 +1,8 @@
-import os, time, shutil, threading, csv
+import os, io, sys, time, json, shutil, threading, queue, csv, functools
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
-from urllib.parse import urlparse, parse_qs
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -17,9 +18,24 @@ import itertools
 SCRIPT_DIR = Path(__file__).parent
 DOWNLOAD_DIR = SCRIPT_DIR / "uspa_downloads"
 OUTPUT_FILE = SCRIPT_DIR / "uspa_all_records.csv"
+KNOWN_EMPTY_FILE = SCRIPT_DIR / "uspa_known_empty.json"
 DOWNLOAD_DIR.mkdir(exist_ok=True)
 
-WORKER_COUNT = int(os.environ.get("WORKER_COUNT", 8))
+# One Chrome per worker, so by default don't run more browsers than there are cores
+WORKER_COUNT = int(os.environ.get("WORKER_COUNT", min(8, os.cpu_count() or 1)))
+# Pages with no "Download CSV" button are remembered in KNOWN_EMPTY_FILE. Once a page has been
+# seen empty on KNOWN_EMPTY_STREAK consecutive runs, it gets its vacancy rows filled without a
+# visit for this many days after the last empty observation. 0 re-checks every page.
+KNOWN_EMPTY_TTL_DAYS = int(os.environ.get("KNOWN_EMPTY_TTL_DAYS", 30))
+KNOWN_EMPTY_STREAK = 2
+
+# Optional CSV export endpoint behind the "Download CSV" button. When set, each page's CSV
+# is fetched over plain HTTPS (same location/status/event query) and Chrome is only
+# started as a fallback if that request fails.
+CSV_ENDPOINT = os.environ.get("USPA_CSV_ENDPOINT")
+http = requests.Session()
+# One pooled keep-alive connection per worker so fetches never queue for a socket
+http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=WORKER_COUNT))
 
 # === USPA weight classes (kg portion only, matching CSV format before the "/") ===
 MENS_WEIGHT_CLASSES = [
@@ -30,6 +46,8 @@ WOMENS_WEIGHT_CLASSES = [
     "44kg", "48kg", "52kg", "56kg", "60kg", "67.5kg",
     "75kg", "82.5kg", "90kg", "100kg", "110kg", "110+kg",
 ]
+# Fallback for divisions whose gender can't be read from the name
+ALL_WEIGHT_CLASSES = sorted(set(MENS_WEIGHT_CLASSES + WOMENS_WEIGHT_CLASSES))
 
 # === All recognised USPA divisions (uppercase, matching CSV/DB format) ===
 ALL_DIVISIONS_MEN = [
@@ -49,26 +67,81 @@ ALL_DIVISIONS_WOMEN = [
     "MASTER WOMEN 80 TO 84",
 ]
 ALL_DIVISIONS = ALL_DIVISIONS_MEN + ALL_DIVISIONS_WOMEN
+KNOWN_DIVISIONS = {d.upper() for d in ALL_DIVISIONS}
+
+# === Column layout: the 7 logical CSV columns, then the per-page metadata we add ===
+CSV_COLUMNS = ["Division", "Weight Class", "Lift", "Name", "Kilos", "Pounds", "Date"]
+OUTPUT_COLUMNS = CSV_COLUMNS + ["Location", "Event", "Status", "HasRecord"]
+SLOT_COLUMNS = CSV_COLUMNS[:3]
+# Zero-row frame handed to fill_all_vacancies for pages with no records (read-only)
+NO_RECORDS = pd.DataFrame(columns=OUTPUT_COLUMNS).astype({"HasRecord": bool})
 
 # === Configure Chrome ===
-# Resolve ChromeDriver once so parallel threads don't race to download it
-DRIVER_PATH = ChromeDriverManager().install()
+# Where the last webdriver-manager install path is remembered between runs. Kept for a day,
+# the same window webdriver-manager itself trusts its cached driver for.
+DRIVER_PATH_CACHE = Path.home() / ".cache" / "uspa" / "chromedriver_path.txt"
+DRIVER_PATH_CACHE_TTL = 24 * 60 * 60
+
+
+def resolve_driver_path() -> str:
+    """Return CHROMEDRIVER_PATH if set, else a recently cached install, else install via webdriver-manager."""
+    pinned = os.environ.get("CHROMEDRIVER_PATH")
+    if pinned:
+        return pinned
+    if DRIVER_PATH_CACHE.exists() and time.time() - DRIVER_PATH_CACHE.stat().st_mtime < DRIVER_PATH_CACHE_TTL:
+        cached = DRIVER_PATH_CACHE.read_text().strip()
+        if Path(cached).exists():
+            return cached
+    path = ChromeDriverManager().install()
+    DRIVER_PATH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so a concurrent run never reads a half-written path
+    tmp = DRIVER_PATH_CACHE.with_name(f"{DRIVER_PATH_CACHE.name}.{os.getpid()}.tmp")
+    tmp.write_text(path)
+    tmp.replace(DRIVER_PATH_CACHE)
+    return path
+
+# Requests Chrome drops outright: images, fonts, media and analytics. Stylesheets are left
+# alone so the Download CSV button keeps its normal layout for the clickable check.
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.mp4",
+    "*google-analytics*", "*googletagmanager*", "*doubleclick*",
+]
+
+# Resolved once, by the first thread that needs a browser (under drivers_lock so parallel
+# threads don't race to download it). Runs served entirely by CSV_ENDPOINT never resolve it.
+DRIVER_PATH: str | None = None
 
 def make_driver(download_dir: Path) -> webdriver.Chrome:
     opts = Options()
-    opts.add_argument("--headless")
+    # Return from driver.get() at DOMContentLoaded; scrape_url waits for the iframe itself to load
+    opts.page_load_strategy = "eager"
+    opts.add_argument("--headless=new")
     opts.add_argument("--disable-gpu")
     opts.add_argument("--no-sandbox")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("window-size=1920,1080")
+    # Only the Download CSV button matters — skip images and background services
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_argument("--disable-extensions")
+    opts.add_argument("--disable-background-networking")
+    opts.add_argument("--disable-sync")
+    opts.add_argument("--metrics-recording-only")
+    opts.add_argument("--disable-features=Translate,BackForwardCache,MediaRouter")
     prefs = {
         "download.default_directory": str(download_dir),
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True,
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
     }
     opts.add_experimental_option("prefs", prefs)
-    return webdriver.Chrome(service=Service(DRIVER_PATH), options=opts)
+    driver = webdriver.Chrome(service=Service(DRIVER_PATH), options=opts)
+    driver.set_page_load_timeout(30)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return driver
 
 # Thread-local storage: each worker thread gets its own driver + download dir
 thread_local = threading.local()
@@ -76,7 +149,11 @@ all_drivers: list[webdriver.Chrome] = []
 drivers_lock = threading.Lock()
 
 def get_driver() -> tuple[webdriver.Chrome, Path]:
+    global DRIVER_PATH
     if not hasattr(thread_local, "driver"):
+        with drivers_lock:
+            if DRIVER_PATH is None:
+                DRIVER_PATH = resolve_driver_path()
         name = threading.current_thread().name.replace("/", "-")
         worker_dir = DOWNLOAD_DIR / name
         worker_dir.mkdir(exist_ok=True)
@@ -106,8 +183,9 @@ events = [
 statuses = ["drug-tested", "non-tested"]
 
 base_url = "https://records.uspa.net/records.php"
+# (location, status, event, url) — the query values are kept alongside the URL so they never need re-parsing
 urls = [
-    f"{base_url}?location={location}&status={status}&event={event}"
+    (location, status, event, f"{base_url}?location={location}&status={status}&event={event}")
     for location, status, event in itertools.product(locations, statuses, events)
 ]
 
@@ -117,21 +195,48 @@ if max_urls:
 
 print(f"\nTotal record pages to check: {len(urls)}")
 
+
+def load_known_empty() -> dict[str, dict]:
+    """Return {"location|status|event": {"seen": last_empty_ts, "streak": n}} entries within KNOWN_EMPTY_TTL_DAYS."""
+    try:
+        entries = json.loads(KNOWN_EMPTY_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+    cutoff = time.time() - KNOWN_EMPTY_TTL_DAYS * 24 * 60 * 60
+    return {
+        key: entry for key, entry in entries.items()
+        if isinstance(entry, dict) and entry.get("seen", 0) >= cutoff
+    }
+
+
+def is_known_empty(key: str) -> bool:
+    """True once a page has been seen empty on KNOWN_EMPTY_STREAK consecutive runs."""
+    return known_empty.get(key, {}).get("streak", 0) >= KNOWN_EMPTY_STREAK
+
+
+known_empty = load_known_empty()
+known_empty_lock = threading.Lock()
+skippable = sum(map(is_known_empty, known_empty))
+if skippable:
+    print(f"{skippable} page(s) known to be empty — filling their vacancies without a visit.")
+
 # Always start fresh — clear any existing output
 if OUTPUT_FILE.exists():
     OUTPUT_FILE.unlink()
     print("Cleared existing output file.")
 
 
-def wait_for_download(download_dir: Path, timeout: int = 15) -> Path | None:
+def wait_for_download(download_dir: Path, timeout: int = 15, poll: float = 0.1) -> Path | None:
     """Wait until a CSV is fully downloaded (no .crdownload temp file remains)."""
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        crdownloads = list(download_dir.glob("*.crdownload"))
-        csvs = list(download_dir.glob("*.csv"))
-        if csvs and not crdownloads:
-            return csvs[0]
-        time.sleep(0.5)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        # One directory listing per poll instead of two globs
+        names = os.listdir(download_dir)
+        if not any(n.endswith(".crdownload") for n in names):
+            csv_name = next((n for n in names if n.endswith(".csv")), None)
+            if csv_name is not None:
+                return download_dir / csv_name
+        time.sleep(poll)
     return None
 
 
@@ -145,20 +250,25 @@ def clear_downloads(download_dir: Path) -> None:
 LIFT_ORDER = {"Squat": 0, "Bench": 1, "Deadlift": 2, "TOTAL": 3}
 
 
-def _extract_kg(weight_class: str) -> str:
+def _extract_kg(weight_class: pd.Series) -> pd.Series:
     """Extract the kg portion from CSV format: '60kg/132.2lb' → '60kg', '140+kg/SHW' → '140+kg'."""
-    return str(weight_class).split("/")[0].strip()
+    return weight_class.astype(str).str.split("/", n=1).str[0].str.strip()
 
 
-def _wc_sort_key(weight_class: str) -> float:
-    """Numeric sort key for a weight class: '67.5kg/...' → 67.5, '140+kg/...' → 140.1."""
-    kg = _extract_kg(str(weight_class)).replace("kg", "")
-    if kg.endswith("+"):
-        return float(kg[:-1]) + 0.1
-    try:
-        return float(kg)
-    except ValueError:
-        return 9999.0
+def _wc_sort_key(weight_class: pd.Series) -> pd.Series:
+    """Numeric sort key for weight classes: '67.5kg/...' → 67.5, '140+kg/...' → 140.1, unparseable → 9999."""
+    kg = _extract_kg(weight_class).str.replace("kg", "", regex=False)
+    plus = kg.str.endswith("+")
+    return (pd.to_numeric(kg.str.removesuffix("+"), errors="coerce") + plus * 0.1).fillna(9999.0)
+
+
+def _sort_key(column: pd.Series) -> pd.Series:
+    """sort_values key: numeric kg for Weight Class, LIFT_ORDER rank for Lift, as-is otherwise."""
+    if column.name == "Weight Class":
+        return _wc_sort_key(column)
+    if column.name == "Lift":
+        return column.map(LIFT_ORDER).fillna(99)
+    return column
 
 
 def _expected_weight_classes(division: str) -> list[str]:
@@ -168,17 +278,33 @@ def _expected_weight_classes(division: str) -> list[str]:
         return WOMENS_WEIGHT_CLASSES
     if "MEN" in div:
         return MENS_WEIGHT_CLASSES
-    return sorted(set(MENS_WEIGHT_CLASSES + WOMENS_WEIGHT_CLASSES))
+    return ALL_WEIGHT_CLASSES
 
 
-def _expected_lifts(event: str) -> list[str]:
-    """Return the lifts that make sense for the given event type."""
+@functools.lru_cache(maxsize=None)
+def _expected_lifts(event: str) -> tuple[str, ...]:
+    """Return the lifts that make sense for the given event type (cached; there are only 10 events)."""
     e = event.lower()
     if "bench-only" in e:
-        return ["Bench"]
+        return ("Bench",)
     if "deadlift-only" in e:
-        return ["Deadlift"]
-    return ["Squat", "Bench", "Deadlift", "TOTAL"]
+        return ("Deadlift",)
+    return ("Squat", "Bench", "Deadlift", "TOTAL")
+
+
+@functools.lru_cache(maxsize=None)
+def _expected_slots(lifts: tuple[str, ...]) -> pd.DataFrame:
+    """Every (Division, Weight Class, Lift) slot across ALL_DIVISIONS for the given lifts."""
+    return pd.concat(
+        [
+            pd.MultiIndex.from_product([divisions, weight_classes, lifts], names=SLOT_COLUMNS).to_frame(index=False)
+            for divisions, weight_classes in (
+                (ALL_DIVISIONS_MEN, MENS_WEIGHT_CLASSES),
+                (ALL_DIVISIONS_WOMEN, WOMENS_WEIGHT_CLASSES),
+            )
+        ],
+        ignore_index=True,
+    )
 
 
 def fill_all_vacancies(
@@ -195,65 +321,44 @@ def fill_all_vacancies(
     """
     lifts = _expected_lifts(event)
 
-    # Build a set of (division_upper, lift, wc_kg) for all real records
+    # (division_upper, wc_kg, lift) for all real records
     real = df[df["HasRecord"] == True]
-    existing = set(
-        zip(
-            real["Division"].str.upper(),
-            real["Lift"].astype(str),
-            real["Weight Class"].apply(lambda x: _extract_kg(str(x))),
+    existing = pd.MultiIndex.from_arrays([
+        real["Division"].str.upper(),
+        _extract_kg(real["Weight Class"]),
+        real["Lift"].astype(str),
+    ])
+
+    # Expected slots for all known USPA divisions, plus any divisions in the CSV not covered by ALL_DIVISIONS
+    slots = _expected_slots(lifts)
+    unknown = [d for d in real["Division"].dropna().unique() if str(d).upper() not in KNOWN_DIVISIONS]
+    if unknown:
+        slots = pd.concat(
+            [slots] + [
+                pd.MultiIndex.from_product([[d], _expected_weight_classes(d), lifts], names=SLOT_COLUMNS).to_frame(index=False)
+                for d in unknown
+            ],
+            ignore_index=True,
         )
-    )
 
-    placeholder_rows = []
-
-    def _add_if_missing(division: str, lift: str, wc: str) -> None:
-        if (division.upper(), lift, wc) not in existing:
-            placeholder_rows.append({
-                "Division": division,
-                "Weight Class": wc,
-                "Lift": lift,
-                "Name": "No existing record",
-                "Kilos": float("nan"),
-                "Pounds": float("nan"),
-                "Date": None,
-                "Location": location,
-                "Event": event,
-                "Status": status,
-                "HasRecord": False,
-            })
-
-    # Fill all known USPA divisions
-    for division in ALL_DIVISIONS:
-        for lift in lifts:
-            for wc in _expected_weight_classes(division):
-                _add_if_missing(division, lift, wc)
-
-    # Also fill any divisions in the CSV not covered by ALL_DIVISIONS
-    known_upper = {d.upper() for d in ALL_DIVISIONS}
-    for division in real["Division"].dropna().unique():
-        if str(division).upper() not in known_upper:
-            for lift in lifts:
-                for wc in _expected_weight_classes(division):
-                    _add_if_missing(division, lift, wc)
-
-    combined = pd.concat(
-        [df, pd.DataFrame(placeholder_rows)] if placeholder_rows else [df],
-        ignore_index=True,
+    slot_keys = pd.MultiIndex.from_arrays([slots["Division"].str.upper(), slots["Weight Class"], slots["Lift"]])
+    placeholders = slots[~slot_keys.isin(existing)].assign(
+        Name="No existing record",
+        Kilos=float("nan"),
+        Pounds=float("nan"),
+        Date=None,
+        Location=location,
+        Event=event,
+        Status=status,
+        HasRecord=False,
     )
+    combined = pd.concat([df, placeholders], ignore_index=True)
 
     # Sort: Division → Weight Class (numeric kg) → Lift
-    combined["_wc_sort"] = combined["Weight Class"].apply(_wc_sort_key)
-    combined["_lift_sort"] = combined["Lift"].map(LIFT_ORDER).fillna(99)
-    combined = (
-        combined
-        .sort_values(["Division", "_wc_sort", "_lift_sort"], ignore_index=True)
-        .drop(columns=["_wc_sort", "_lift_sort"])
-    )
-    return combined
+    return combined.sort_values(SLOT_COLUMNS, key=_sort_key, ignore_index=True)
 
 
-def _read_csv_robust(csv_path: Path) -> pd.DataFrame | None:
+def _read_csv_robust(source: Path | io.StringIO) -> pd.DataFrame | None:
     """Read a USPA CSV, reconstructing names that contain unquoted commas.
 
     The CSV always has exactly 7 logical columns:
@@ -261,11 +366,13 @@ def _read_csv_robust(csv_path: Path) -> pd.DataFrame | None:
     When a name contains a comma (e.g. "Smith, John"), the raw row has 8+
     fields.  We recover the full name by joining everything between the 3rd
     and the last-3 positions.
+
+    ``source`` is either a downloaded file or an in-memory response body.
     """
-    COLS = ["Division", "Weight Class", "Lift", "Name", "Kilos", "Pounds", "Date"]
     rows = []
     try:
-        with open(csv_path, newline="", encoding="utf-8", errors="replace") as f:
+        f = source if isinstance(source, io.StringIO) else open(source, newline="", encoding="utf-8", errors="replace")
+        with f:
             reader = csv.reader(f)
             try:
                 next(reader)  # skip header
@@ -287,32 +394,76 @@ def _read_csv_robust(csv_path: Path) -> pd.DataFrame | None:
     if not rows:
         return None
 
-    df = pd.DataFrame(rows, columns=COLS)
+    df = pd.DataFrame(rows, columns=CSV_COLUMNS)
     # Coerce numeric columns
     df["Kilos"] = pd.to_numeric(df["Kilos"], errors="coerce")
     df["Pounds"] = pd.to_numeric(df["Pounds"], errors="coerce")
     return df
 
 
-def scrape_url(driver, url: str, download_dir: Path) -> pd.DataFrame | None:
-    """Visit a single record page, download its CSV, and return a DataFrame.
+def fetch_csv(location: str, status: str, event: str) -> pd.DataFrame | None:
+    """Fetch a page's CSV straight from CSV_ENDPOINT, bypassing the browser.
+
+    Raises requests.RequestException (so the caller falls back to Chrome) when the
+    response doesn't start with the expected CSV header, e.g. an HTML or error page.
+    """
+    resp = http.get(
+        CSV_ENDPOINT,
+        params={"location": location, "status": status, "event": event},
+        timeout=30,
+    )
+    resp.raise_for_status()
+    # Decode as UTF-8 like the downloaded file, not requests' charset guess (ISO-8859-1 for text/*)
+    text = resp.content.decode("utf-8", errors="replace")
+    header = next(csv.reader(io.StringIO(text, newline="")), None)
+    if header is None or [h.strip() for h in header] != CSV_COLUMNS:
+        raise requests.RequestException(f"response is not a records CSV (first row: {header!r:.80})")
+    return _read_csv_robust(io.StringIO(text, newline=""))
+
+
+def scrape_url(location: str, status: str, event: str, url: str) -> pd.DataFrame | None:
+    """Fetch the CSV for a single record page and return a DataFrame.
+
+    Uses CSV_ENDPOINT when configured, otherwise (or if that request fails)
+    visits the page in this thread's Chrome and clicks "Download CSV".
 
     Returns:
         DataFrame with records (HasRecord=True), or a single placeholder row
         (HasRecord=False) when no records exist for the combination.
         Returns None only on a page-level error (navigation/iframe failure).
     """
-    params = parse_qs(urlparse(url).query)
-    location_value = params["location"][0]
-    status_value = params["status"][0]
-    event_value = params.get("event", [""])[0]
-
     def all_vacancies() -> pd.DataFrame:
         """Return full placeholder rows for every division × weight class × lift."""
-        empty = pd.DataFrame(columns=["Division", "Weight Class", "Lift", "Name", "Kilos", "Pounds", "Date", "Location", "Event", "Status", "HasRecord"])
-        empty["HasRecord"] = empty["HasRecord"].astype(bool)
-        return fill_all_vacancies(empty, location_value, event_value, status_value)
+        return fill_all_vacancies(NO_RECORDS, location, event, status)
+
+    def with_vacancies(df: pd.DataFrame | None) -> pd.DataFrame:
+        """Tag parsed records with their page metadata and fill every vacancy around them."""
+        if df is None or df.empty:
+            print("  CSV was empty — filling vacancies")
+            return all_vacancies()
+
+        df["Location"] = location
+        df["Event"] = event
+        df["Status"] = status
+        df["HasRecord"] = True
+
+        df = fill_all_vacancies(df, location, event, status)
+        added = len(df[df["HasRecord"] == False])
+        print(f"  Loaded {len(df[df['HasRecord'] == True])} rows ({added} vacancies filled)")
+        return df
+
+    empty_key = f"{location}|{status}|{event}"
+    if is_known_empty(empty_key):
+        print("  Known empty — filling vacancies")
+        return all_vacancies()
+
+    if CSV_ENDPOINT:
+        try:
+            return with_vacancies(fetch_csv(location, status, event))
+        except requests.RequestException as e:
+            print(f"  Direct fetch failed ({e}) — falling back to Chrome")
 
+    driver, download_dir = get_driver()
     driver.get(url)
 
     # Wait for iframe and switch into it
@@ -320,6 +471,11 @@ def scrape_url(driver, url: str, download_dir: Path) -> pd.DataFrame | None:
     driver.switch_to.frame(driver.find_element(By.ID, "content-iframe"))
 
     try:
+        # The eager page load doesn't wait for the iframe's document, so let it finish loading
+        # before the 10s button wait — otherwise a slow frame looks like a page with no records.
+        WebDriverWait(driver, 30).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
         clear_downloads(download_dir)
 
         try:
@@ -328,8 +484,15 @@ def scrape_url(driver, url: str, download_dir: Path) -> pd.DataFrame | None:
             )
         except TimeoutException:
             print("  No records for this combination — filling vacancies")
+            with known_empty_lock:
+                streak = known_empty.get(empty_key, {}).get("streak", 0) + 1
+                known_empty[empty_key] = {"seen": time.time(), "streak": streak}
             return all_vacancies()
 
+        # The page has records after all — any earlier empty observations no longer count
+        with known_empty_lock:
+            known_empty.pop(empty_key, None)
+
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
         WebDriverWait(driver, 5).until(EC.element_to_be_clickable(button)).click()
         print("  Download initiated")
@@ -339,24 +502,11 @@ def scrape_url(driver, url: str, download_dir: Path) -> pd.DataFrame | None:
             print("  CSV download timed out — filling vacancies")
             return all_vacancies()
 
-        df = _read_csv_robust(csv_path)
-        if df is None or df.empty:
-            print("  CSV was empty — filling vacancies")
-            return all_vacancies()
-
-        df["Location"] = location_value
-        df["Event"] = event_value
-        df["Status"] = status_value
-        df["HasRecord"] = True
-
-        df = fill_all_vacancies(df, location_value, event_value, status_value)
-        added = len(df[df["HasRecord"] == False])
-        print(f"  Loaded {len(df[df['HasRecord'] == True])} rows ({added} vacancies filled)")
-        return df
+        return with_vacancies(_read_csv_robust(csv_path))
 
     except Exception as e:
         print(f"  Failed: {e}")
-        safe_name = f"{location_value}_{status_value}_{event_value}".replace("/", "-")
+        safe_name = f"{location}_{status}_{event}".replace("/", "-")
         driver.save_screenshot(f"debug_{safe_name}.png")
         return None
 
@@ -365,28 +515,99 @@ def scrape_url(driver, url: str, download_dir: Path) -> pd.DataFrame | None:
 
 
 # === Main scrape loop ===
-lock = threading.Lock()
 total = len(urls)
 rows_written = 0
+# Workers hand finished frames to a single writer thread so they never block on disk I/O.
+# Bounded so a stalled writer applies back-pressure instead of buffering the whole scrape.
+results: queue.Queue = queue.Queue(maxsize=64)
+
+WRITE_BATCH = 32         # frames concatenated into a single write
+WRITE_IDLE_SECONDS = 5   # write a partial batch if no frame arrives for this long
+writer_error: Exception | None = None  # set if the writer thread dies; the run then exits non-zero
+
+
+def write_results() -> None:
+    """Append frames from the results queue to OUTPUT_FILE until a None sentinel arrives.
+
+    Frames are buffered and written WRITE_BATCH at a time (or after WRITE_IDLE_SECONDS
+    without a new frame). The file is opened once, on the first write, which also emits
+    the header, and kept open for the rest of the run. Rows go through csv.writer
+    directly rather than pandas' to_csv, with NaN written as an empty field.
+
+    Any exception is stored in writer_error and ends the thread; producers notice via
+    writer_thread.is_alive() and stop enqueuing.
+    """
+    global rows_written, writer_error
+    out = None
+    writer = None
+    batch: list[pd.DataFrame] = []
+
+    def write_batch() -> None:
+        nonlocal out, writer
+        if not batch:
+            return
+        if out is None:
+            out = OUTPUT_FILE.open("w", newline="", buffering=1 << 16)
+            writer = csv.writer(out, lineterminator="\n")
+            writer.writerow(OUTPUT_COLUMNS)
+        for df in batch:
+            writer.writerows(
+                [None if v != v else v for v in row]  # NaN → empty field
+                for row in df[OUTPUT_COLUMNS].itertuples(index=False, name=None)
+            )
+        out.flush()
+        batch.clear()
+
+    try:
+        while True:
+            try:
+                df = results.get(timeout=WRITE_IDLE_SECONDS)
+            except queue.Empty:
+                write_batch()
+                continue
+            if df is None:
+                break
+            batch.append(df)
+            rows_written += len(df)
+            if len(batch) >= WRITE_BATCH:
+                write_batch()
+        write_batch()
+    except Exception as e:
+        writer_error = e
+        print(f"  Writer failed: {e}")
+    finally:
+        if out is not None:
+            out.close()
+
+
+def enqueue_result(item: pd.DataFrame | None) -> bool:
+    """Put an item on the results queue; give up (False) if the writer thread has died."""
+    while writer_thread.is_alive():
+        try:
+            results.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
 
 def process_url(args: tuple) -> None:
-    global rows_written
-    i, url = args
-    driver, download_dir = get_driver()
+    i, (location, status, event, url) = args
+    if not writer_thread.is_alive():
+        return  # nothing can be saved any more; let the remaining URLs drain quickly
     print(f"\n[{i}/{total}] {url}")
     try:
-        df = scrape_url(driver, url, download_dir)
+        df = scrape_url(location, status, event, url)
     except Exception as e:
         print(f"  Error loading page: {e}")
         df = None
-    with lock:
-        if df is not None:
-            write_header = not OUTPUT_FILE.exists()
-            df.to_csv(OUTPUT_FILE, mode="a", header=write_header, index=False)
-            rows_written += len(df)
+    if df is not None:
+        enqueue_result(df)
 
+writer_thread = threading.Thread(target=write_results, name="writer")
+writer_thread.start()
 try:
-    args = [(i, url) for i, url in enumerate(urls, 1)]
+    args = list(enumerate(urls, 1))
     with ThreadPoolExecutor(max_workers=WORKER_COUNT) as executor:
         futures = [executor.submit(process_url, a) for a in args]
         for future in as_completed(futures):
@@ -395,6 +616,9 @@ try:
             except Exception as e:
                 print(f"  Worker error: {e}")
 finally:
+    enqueue_result(None)
+    writer_thread.join()
+    KNOWN_EMPTY_FILE.write_text(json.dumps(known_empty, indent=2, sort_keys=True))
     for d in all_drivers:
         try:
             d.quit()
@@ -402,10 +626,13 @@ finally:
             pass
 
 # === Final output ===
+if writer_error is not None:
+    # Fail the job so the upload step never truncates the table for a partial CSV
+    print(f"\nWriting {OUTPUT_FILE} failed ({writer_error}) — aborting.")
+    sys.exit(1)
 if OUTPUT_FILE.exists():
     print(f"\nAll records saved to: {OUTPUT_FILE}  ({rows_written} rows written)")
 else:
-    import sys
     print("\nNo CSVs were collected — aborting.")
     sys.exit(1)
 
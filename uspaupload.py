@@ -1,6 +1,5 @@
 import os
 import math
-import json
 import time
 import threading
 from pathlib import Path
@@ -19,6 +18,10 @@ INPUT_FILE = Path(__file__).parent / "uspa_all_records.csv"
 BATCH_SIZE = int(os.getenv("USPA_UPLOAD_BATCH_SIZE", "1000"))
 WORKERS = int(os.getenv("USPA_UPLOAD_WORKERS", "2"))
 POSTGREST_TIMEOUT = int(os.getenv("USPA_UPLOAD_TIMEOUT", "60"))
+# Optional direct Postgres connection string. When set, the table is replaced with a single
+# TRUNCATE + COPY over psycopg instead of batched PostgREST inserts.
+SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
+COPY_CHUNK_ROWS = 50_000  # rows serialized per copy.write() so the CSV is never held in full
 
 def new_client():
     return create_client(
@@ -37,15 +40,25 @@ def upload_client():
         thread_local.client = new_client()
     return thread_local.client
 
+
+def copy_upload(df):
+    """Replace the table contents with one TRUNCATE + COPY ... FROM STDIN transaction."""
+    import psycopg  # only needed for the COPY path
+
+    with psycopg.connect(SUPABASE_DB_URL) as conn, conn.cursor() as cur:
+        cur.execute("SELECT truncate_uspa_records()")
+        with cur.copy(f"COPY {TABLE_NAME} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)") as copy:
+            for start in range(0, len(df), COPY_CHUNK_ROWS):
+                copy.write(df.iloc[start : start + COPY_CHUNK_ROWS].to_csv(index=False, header=False))
+    # Leaving the connection block commits, so readers never see a half-empty table
+
 # === Load CSV ===
 print(f"Reading {INPUT_FILE}...")
 df = pd.read_csv(INPUT_FILE)
 
 # Normalize weight_class to kg-only ("60kg/132.2lb" → "60kg", "140+kg/SHW" → "140+kg")
 # so it matches the placeholder rows and is consistent in the DB.
-df["Weight Class"] = df["Weight Class"].apply(
-    lambda wc: str(wc).split("/")[0].strip() if pd.notna(wc) else None
-)
+df["Weight Class"] = df["Weight Class"].astype("string").str.split("/", n=1).str[0].str.strip()
 
 # Ensure correct types
 df["Kilos"] = pd.to_numeric(df["Kilos"], errors="coerce")
@@ -67,55 +80,61 @@ df = df.rename(columns={
     "HasRecord":    "has_record",
 })
 
-# Serialize through pandas' JSON encoder (handles NaN → null, numpy types → native)
-# then immediately parse back to get a list of plain Python dicts with None for nulls.
-records = json.loads(df.to_json(orient="records"))
-print(f"Loaded {len(records)} rows")
-
-# === Clear existing data ===
-print("Clearing existing table data...")
-supabase.rpc("truncate_uspa_records").execute()
-count_after = supabase.table(TABLE_NAME).select("id", count="exact").execute().count
-if count_after != 0:
-    raise RuntimeError(f"Truncate failed — {count_after} rows still in table.")
-print("Table cleared.")
-
-# === Upload in batches (parallel) ===
-batches = [records[i * BATCH_SIZE : (i + 1) * BATCH_SIZE] for i in range(math.ceil(len(records) / BATCH_SIZE))]
-total_batches = len(batches)
-print(f"Uploading {total_batches} batch(es) of up to {BATCH_SIZE} rows each with {WORKERS} workers...")
-
-completed = 0
-
-def upload_batch(args):
-    i, batch = args
-    client = upload_client()
-    for attempt in range(3):
-        try:
-            print(f"  Batch {i}/{total_batches} starting attempt {attempt + 1} ({len(batch)} rows)", flush=True)
-            client.table(TABLE_NAME).insert(batch, returning=ReturnMethod.minimal).execute()
-            return i, len(batch)
-        except Exception as exc:
-            if attempt == 2:
-                raise
-            # Discard broken connection so next attempt gets a fresh one
-            if hasattr(thread_local, "client"):
-                del thread_local.client
-            wait = 2 ** attempt
-            print(f"  Batch {i}/{total_batches} failed attempt {attempt + 1}: {exc}; retrying in {wait}s", flush=True)
-            time.sleep(wait)  # 1s, 2s backoff
-
-with ThreadPoolExecutor(max_workers=WORKERS) as executor:
-    futures = [executor.submit(upload_batch, (i + 1, batch)) for i, batch in enumerate(batches)]
-    for future in as_completed(futures):
-        i, count = future.result()
-        completed += count
-        print(f"  Batch {i}/{total_batches} done — {completed}/{len(records)} rows uploaded")
+total_rows = len(df)
+print(f"Loaded {total_rows} rows")
+
+if SUPABASE_DB_URL:
+    # === Clear + load in one transaction via COPY ===
+    print("Replacing table data via COPY...")
+    copy_upload(df)
+else:
+    # Box values as native Python objects with None for nulls, so each batch can go straight
+    # through to_dict() when it is uploaded — no JSON round-trip, no full list of dicts up front.
+    df = df.astype(object).where(df.notna(), None)
+
+    # === Clear existing data ===
+    print("Clearing existing table data...")
+    supabase.rpc("truncate_uspa_records").execute()
+    count_after = supabase.table(TABLE_NAME).select("id", count="exact").execute().count
+    if count_after != 0:
+        raise RuntimeError(f"Truncate failed — {count_after} rows still in table.")
+    print("Table cleared.")
+
+    # === Upload in batches (parallel) ===
+    total_batches = math.ceil(total_rows / BATCH_SIZE)
+    print(f"Uploading {total_batches} batch(es) of up to {BATCH_SIZE} rows each with {WORKERS} workers...")
+
+    completed = 0
+
+    def upload_batch(i):
+        batch = df.iloc[(i - 1) * BATCH_SIZE : i * BATCH_SIZE].to_dict(orient="records")
+        client = upload_client()
+        for attempt in range(3):
+            try:
+                print(f"  Batch {i}/{total_batches} starting attempt {attempt + 1} ({len(batch)} rows)", flush=True)
+                client.table(TABLE_NAME).insert(batch, returning=ReturnMethod.minimal).execute()
+                return i, len(batch)
+            except Exception as exc:
+                if attempt == 2:
+                    raise
+                # Discard broken connection so next attempt gets a fresh one
+                if hasattr(thread_local, "client"):
+                    del thread_local.client
+                wait = 2 ** attempt
+                print(f"  Batch {i}/{total_batches} failed attempt {attempt + 1}: {exc}; retrying in {wait}s", flush=True)
+                time.sleep(wait)  # 1s, 2s backoff
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        futures = [executor.submit(upload_batch, i) for i in range(1, total_batches + 1)]
+        for future in as_completed(futures):
+            i, count = future.result()
+            completed += count
+            print(f"  Batch {i}/{total_batches} done — {completed}/{total_rows} rows uploaded")
 
 from datetime import datetime
 import subprocess as _sp
 date_str = datetime.now().strftime("%B %d, %Y")
-print(f"\nDone — {len(records)} rows written to '{TABLE_NAME}'.")
+print(f"\nDone — {total_rows} rows written to '{TABLE_NAME}'.")
 
 # Push last_updated.txt to GitHub so the site reflects the new date
 last_updated_file = Path(__file__).parent / "last_updated.txt"